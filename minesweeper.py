@@ -1,5 +1,20 @@
 import itertools
+import logging
 import random
+from collections import defaultdict, deque
+
+logger = logging.getLogger(__name__)
+
+# What a sentence's count says about all of its cells
+_UNKNOWN, _ALL_MINES, _ALL_SAFE = range(3)
+
+# Shared result for sentences that say nothing definite
+_EMPTY = frozenset()
+
+# Offsets of the eight cells around a cell
+_NEIGHBORS = tuple(
+    (di, dj) for di in (-1, 0, 1) for dj in (-1, 0, 1) if (di, dj) != (0, 0)
+)
 
 
 class Minesweeper():
@@ -7,32 +22,55 @@ class Minesweeper():
     Minesweeper game representation
     """
 
-    def __init__(self, height=8, width=8, mines=8):
+    def __init__(self, height=8, width=8, mines=8, rng=None):
 
-        # Set initial width, height, and number of mines
+        # Set initial width and height
         self.height = height
         self.width = width
-        self.mines = set()
 
-        # Initialize an empty field with no mines
-        self.board = []
-        for i in range(self.height):
-            row = []
-            for j in range(self.width):
-                row.append(False)
-            self.board.append(row)
-
-        # Add mines randomly
-        while len(self.mines) != mines:
-            i = random.randrange(height)
-            j = random.randrange(width)
-            if not self.board[i][j]:
-                self.mines.add((i, j))
-                self.board[i][j] = True
+        # Source of randomness: a random.Random, or the global random
+        # module so that random.seed() makes games reproducible
+        if rng is None:
+            rng = random
+
+        # Add mines randomly, sampling distinct cells in one shot; the
+        # board is a bitboard numbering (i, j) as i * width + j
+        self._bits = 0
+        for k in rng.sample(range(height * width), mines):
+            self._bits |= 1 << k
+        self.mines = set(self._cells(self._bits))
+
+        # Bitmask of every cell's neighbours under the same numbering
+        self._nei_mask = [0] * (height * width)
+        for i in range(height):
+            for j in range(width):
+                for di, dj in _NEIGHBORS:
+                    m, n = i + di, j + dj
+                    if 0 <= m < height and 0 <= n < width:
+                        self._nei_mask[i * width + j] |= 1 << (m * width + n)
 
         # At first, player has found no mines
         self.mines_found = set()
 
+    def _cells(self, mask):
+        """
+        Yields the (i, j) cells whose bits are set in mask.
+        """
+        while mask:
+            low = mask & -mask
+            yield divmod(low.bit_length() - 1, self.width)
+            mask ^= low
+
+    @property
+    def board(self):
+        """
+        The board as rows of booleans, True where there is a mine.
+        """
+        return [
+            [self.is_mine((i, j)) for j in range(self.width)]
+            for i in range(self.height)
+        ]
+
     def print(self):
         """
         Prints a text-based representation
@@ -41,7 +79,7 @@ class Minesweeper():
         for i in range(self.height):
             print("--" * self.width + "-")
             for j in range(self.width):
-                if self.board[i][j]:
+                if self.is_mine((i, j)):
                     print("|X", end="")
                 else:
                     print("| ", end="")
@@ -50,7 +88,7 @@ class Minesweeper():
 
     def is_mine(self, cell):
         i, j = cell
-        return self.board[i][j]
+        return (self._bits >> (i * self.width + j)) & 1 == 1
 
     def nearby_mines(self, cell):
         """
@@ -58,24 +96,8 @@ class Minesweeper():
         within one row and column of a given cell,
         not including the cell itself.
         """
-
-        # Keep count of nearby mines
-        count = 0
-
-        # Loop over all cells within one row and column
-        for i in range(cell[0] - 1, cell[0] + 2):
-            for j in range(cell[1] - 1, cell[1] + 2):
-
-                # Ignore the cell itself
-                if (i, j) == cell:
-                    continue
-
-                # Update count if cell in bounds and is mine
-                if 0 <= i < self.height and 0 <= j < self.width:
-                    if self.board[i][j]:
-                        count += 1
-
-        return count
+        i, j = cell
+        return (self._bits & self._nei_mask[i * self.width + j]).bit_count()
 
     def won(self):
         """
@@ -98,6 +120,11 @@ class Sentence():
     def __eq__(self, other):
         return self.cells == other.cells and self.count == other.count
 
+    def __hash__(self):
+        # Changes on mutation: take a sentence out of any set or dict
+        # before calling mark_mine/mark_safe, and put it back after
+        return hash((frozenset(self.cells), self.count))
+
     def __str__(self):
         return f"{self.cells} = {self.count}"
 
@@ -107,8 +134,7 @@ class Sentence():
         """
         if self.count==len(self.cells):
             return self.cells
-        return set()
-        raise NotImplementedError
+        return _EMPTY
 
     def known_safes(self):
         """
@@ -116,8 +142,7 @@ class Sentence():
         """
         if self.count==0:
             return self.cells
-        return set()
-        raise NotImplementedError
+        return _EMPTY
 
     def mark_mine(self, cell):
         """
@@ -142,6 +167,59 @@ class Sentence():
             return None
 
 
+class _BoardSentence(Sentence):
+    """
+    Sentence used inside MinesweeperAI that also keeps its cells as a
+    bitmask, numbering (i, j) as i * width + j, so subset tests are
+    integer operations. Equality and hashing still come from Sentence.
+    Only change it through mark_mine/mark_safe so the mask stays in sync.
+    """
+
+    def __init__(self, cells, count, width):
+        super().__init__(cells, count)
+        self.width = width
+        self.mask = 0
+        for i, j in self.cells:
+            self.mask |= 1 << (i * width + j)
+        self._update_status()
+
+    @classmethod
+    def from_mask(cls, mask, count, width):
+        """
+        Builds a sentence from a cell bitmask.
+        """
+        cells = []
+        while mask:
+            low = mask & -mask
+            cells.append(divmod(low.bit_length() - 1, width))
+            mask ^= low
+        return cls(cells, count, width)
+
+    def _update_status(self):
+        """
+        Caches whether the count marks every cell as a mine or as safe.
+        Must be called whenever mask or count changes.
+        """
+        if self.count == 0:
+            self._status = _ALL_SAFE
+        elif self.count == self.mask.bit_count():
+            self._status = _ALL_MINES
+        else:
+            self._status = _UNKNOWN
+
+    def mark_mine(self, cell):
+        if cell in self.cells:
+            self.mask &= ~(1 << (cell[0] * self.width + cell[1]))
+            super().mark_mine(cell)
+            self._update_status()
+
+    def mark_safe(self, cell):
+        if cell in self.cells:
+            self.mask &= ~(1 << (cell[0] * self.width + cell[1]))
+            super().mark_safe(cell)
+            self._update_status()
+
+
 
 
 class MinesweeperAI():
@@ -149,12 +227,20 @@ class MinesweeperAI():
     Minesweeper game player
     """
 
-    def __init__(self, height=8, width=8):
+    def __init__(self, height=8, width=8, rng=None):
 
         # Set initial height and width
         self.height = height
         self.width = width
 
+        # Source of randomness: a random.Random, or the global random
+        # module so that random.seed() makes random moves reproducible
+        if rng is None:
+            rng = random
+
+        # Log the knowledge base on every safe move when set
+        self.debug = False
+
         # Keep track of which cells have been clicked on
         self.moves_made = set()
 
@@ -162,8 +248,93 @@ class MinesweeperAI():
         self.mines = set()
         self.safes = set()
 
-        # List of sentences about the game known to be true
-        self.knowledge = []
+        # Safe cells that have not been chosen yet
+        self._available_safes = set()
+
+        # Sentences about the game known to be true, keyed by
+        # (mask, count) so a candidate can be looked up before a
+        # sentence is built for it; exposed as self.knowledge
+        self._sentences = {}
+
+        # Sentences in self._sentences that mention each cell, keyed by
+        # id() since a sentence's hash changes whenever it is marked
+        self._cell_index = defaultdict(dict)
+
+        # Sentences added or changed since they were last compared
+        # against the rest of the knowledge base
+        self._dirty = deque()
+
+        # Cells neither chosen nor known to be mines, kept as a dense
+        # list plus a position index so removal and sampling are O(1)
+        self._legal = [(i, j) for i in range(height) for j in range(width)]
+        self._legal_index = {c: k for k, c in enumerate(self._legal)}
+        self._randrange = rng.randrange
+
+        # In-bounds neighbours of every cell
+        self._neighbors = {}
+        for i, j in self._legal:
+            self._neighbors[i, j] = tuple(
+                (i + di, j + dj) for di, dj in _NEIGHBORS
+                if 0 <= i + di < height and 0 <= j + dj < width
+            )
+
+    @property
+    def knowledge(self):
+        """
+        The sentences about the game known to be true.
+        """
+        return self._sentences.values()
+
+    def _add_sentence(self, sentence):
+        """
+        Adds a non-empty sentence to the knowledge base unless an equal
+        sentence is already there. Returns True if it was added.
+        """
+        key = (sentence.mask, sentence.count)
+        if not sentence.mask or key in self._sentences:
+            return False
+        self._sentences[key] = sentence
+        for cell in sentence.cells:
+            self._cell_index[cell][id(sentence)] = sentence
+        self._dirty.append(sentence)
+        return True
+
+    def _mark_sentences(self, cell, mine):
+        """
+        Marks a cell in every sentence that mentions it. Each sentence
+        keeps its index entries for its other cells, and is dropped
+        from the index only if it became empty or a duplicate.
+        """
+        for sentence in self._cell_index.pop(cell, {}).values():
+            del self._sentences[sentence.mask, sentence.count]
+            if mine:
+                sentence.mark_mine(cell)
+            else:
+                sentence.mark_safe(cell)
+
+            key = (sentence.mask, sentence.count)
+            if sentence.mask and key not in self._sentences:
+                self._sentences[key] = sentence
+                self._dirty.append(sentence)
+                continue
+            for other in sentence.cells:
+                sentences = self._cell_index[other]
+                del sentences[id(sentence)]
+                if not sentences:
+                    del self._cell_index[other]
+
+    def _discard_legal(self, cell):
+        """
+        Removes a cell from the random move candidates by swapping
+        it with the last one.
+        """
+        k = self._legal_index.pop(cell, None)
+        if k is None:
+            return
+        last = self._legal.pop()
+        if last != cell:
+            self._legal[k] = last
+            self._legal_index[last] = k
 
     def mark_mine(self, cell):
         """
@@ -171,8 +342,8 @@ class MinesweeperAI():
         to mark that cell as a mine as well.
         """
         self.mines.add(cell)
-        for sentence in self.knowledge:
-            sentence.mark_mine(cell)
+        self._discard_legal(cell)
+        self._mark_sentences(cell, True)
 
     def mark_safe(self, cell):
         """
@@ -180,8 +351,9 @@ class MinesweeperAI():
         to mark that cell as safe as well.
         """
         self.safes.add(cell)
-        for sentence in self.knowledge:
-            sentence.mark_safe(cell)
+        if cell not in self.moves_made:
+            self._available_safes.add(cell)
+        self._mark_sentences(cell, False)
 
     def add_knowledge(self, cell, count):
         """
@@ -199,68 +371,60 @@ class MinesweeperAI():
                if they can be inferred from existing knowledge
         """
         self.moves_made.add(cell)
+        self._available_safes.discard(cell)
+        self._discard_legal(cell)
         self.mark_safe(cell)
         neighbours=set()
-        i=cell[0]
-        j=cell[1]
-        for m in range(i-1,i+2):
-            for n in range(j-1,j+2):
-                if (m==i and n==j) or (m<0) or (n<0) or (m>=self.height) or (n>=self.width) :
-                    continue
-                else:
-                    if (m,n) in self.mines:
-                        count=count-1
-                    elif (m,n) not in self.safes:
-                        neighbours.add((m,n))
+        for neighbour in self._neighbors[cell]:
+            if neighbour in self.mines:
+                count=count-1
+            elif neighbour not in self.safes:
+                neighbours.add(neighbour)
         if neighbours:
-            new_sentence=Sentence(neighbours,count)    
-            if new_sentence not in self.knowledge:
-                self.knowledge.append(new_sentence)
+            self._add_sentence(_BoardSentence(neighbours,count,self.width))
         
-        possible_inference=True
-        while possible_inference:
-            possible_inference=False
-            for i,sentence in enumerate(self.knowledge.copy()):
-
-                if cell in sentence.cells:
-                    sentence.cells.remove(cell)
-                    possible_inference=True
-
-                if not sentence.cells:
-                    self.knowledge.remove(sentence)
-                                    
-
-                for block in sentence.known_mines().copy():
+        # Propagate from changed sentences only: a pair of unchanged
+        # sentences was already compared when the later one changed
+        dirty=self._dirty
+        while dirty:
+            sentence=dirty.popleft()
+            if self._sentences.get((sentence.mask,sentence.count)) is not sentence:
+                continue
+
+            # Decided sentences are consumed by marking their cells,
+            # which queues every sentence that mentions them
+            if sentence._status==_ALL_MINES:
+                for block in list(sentence.cells):
                     self.mark_mine(block)
-                    possible_inference=True
-                for block in sentence.known_safes().copy():
+                continue
+            if sentence._status==_ALL_SAFE:
+                for block in list(sentence.cells):
                     self.mark_safe(block)
-                    possible_inference=True
-
-
-
-            infered_sentences=[]
-            for i,sentence in enumerate(self.knowledge):
-                for following in self.knowledge[i+1:]:
-                    if following.cells < sentence.cells:
-                        new_cells=sentence.cells-following.cells
-                        new_count=sentence.count-following.count
-                        if new_cells:
-                            infered_sentences.append(Sentence(new_cells,new_count))
-
-                    if sentence.cells < following.cells:
-                        new_cells=following.cells-sentence.cells
-                        new_count=following.count-sentence.count
-                        if new_cells:
-                            infered_sentences.append(Sentence(new_cells,new_count))
-
-            for s in infered_sentences:
-                if s not in self.knowledge:
-                    possible_inference=True
-                    self.knowledge.append(s)            
-                        
+                continue
+
+            # Only sentences sharing a cell can be subsets of each other
+            others={}
+            for block in sentence.cells:
+                others.update(self._cell_index[block])
+
+            # Derived sentences are kept as keys until they are known
+            # to be new, so duplicates never allocate a sentence
+            infered_keys=set()
+            a=sentence.mask
+            size=a.bit_count()
+            for other in others.values():
+                if other._status!=_UNKNOWN:
+                    continue
+                b=other.mask
+                other_size=b.bit_count()
+                # A proper subset must be strictly smaller
+                if size<other_size and a&b==a:
+                    infered_keys.add((b&~a,other.count-sentence.count))
+                elif other_size<size and a&b==b:
+                    infered_keys.add((a&~b,sentence.count-other.count))
 
-        
+            for mask,new_count in infered_keys.difference(self._sentences):
+                self._add_sentence(_BoardSentence.from_mask(mask,new_count,self.width))
 
 
     def make_safe_move(self):
@@ -272,14 +436,10 @@ class MinesweeperAI():
         This function may use the knowledge in self.mines, self.safes
         and self.moves_made, but should not modify any of those values.
         """
-        for sentence in self.knowledge:
-            print(sentence)
-        print("\n")
-        if self.safes:
-            for m in self.safes:
-                if m not in self.moves_made:
-                    return m
-        return None
+        if self.debug:
+            for sentence in self.knowledge:
+                logger.debug("%s", sentence)
+        return next(iter(self._available_safes), None)
 
 
     def make_random_move(self):
@@ -288,12 +448,8 @@ class MinesweeperAI():
         Should choose randomly among cells that:
             1) have not already been chosen, and
             2) are not known to be mines
+        Returns None if there is no such cell.
         """
-        while True:
-            (i,j)=random.randint(0,self.height-1),random.randint(0,self.width-1)
-            if (i,j) in self.moves_made or  (i,j) in self.mines:
-                (i,j)=random.randint(0,self.height-1),random.randint(0,self.width-1)
-            if (i,j) not in self.moves_made and (i,j) not in self.mines:
-                return (i,j)
-
-        raise NotImplementedError
+        if not self._legal:
+            return None
+        return self._legal[self._randrange(len(self._legal))]
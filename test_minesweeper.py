@@ -0,0 +1,148 @@
+import random
+import unittest
+
+from minesweeper import Minesweeper, MinesweeperAI, Sentence
+
+
+def neighbours(cell, height, width):
+    i, j = cell
+    return {
+        (m, n)
+        for m in range(i - 1, i + 2)
+        for n in range(j - 1, j + 2)
+        if (m, n) != cell and 0 <= m < height and 0 <= n < width
+    }
+
+
+def brute_force_closure(height, width, observations):
+    """
+    Reference inference: rebuilds every sentence from scratch out of
+    the (cell, count) observations and applies the known-cell and
+    subset rules over all pairs until nothing changes.
+    """
+    mines = set()
+    safes = {cell for cell, _ in observations}
+    sentences = {
+        (frozenset(neighbours(cell, height, width)), count)
+        for cell, count in observations
+    }
+    changed = True
+    while changed:
+        changed = False
+        reduced = set()
+        for cells, count in sentences:
+            count -= len(cells & mines)
+            cells = cells - mines - safes
+            if not cells:
+                continue
+            if count == 0:
+                safes |= cells
+                changed = True
+            elif count == len(cells):
+                mines |= cells
+                changed = True
+            else:
+                reduced.add((cells, count))
+        for a_cells, a_count in list(reduced):
+            for b_cells, b_count in list(reduced):
+                if a_cells < b_cells:
+                    derived = (b_cells - a_cells, b_count - a_count)
+                    if derived not in reduced:
+                        reduced.add(derived)
+                        changed = True
+        sentences = reduced
+    return mines, safes
+
+
+class InferenceTest(unittest.TestCase):
+
+    def play(self, height, width, mine_count, seed):
+        """
+        Reveals cells in a fixed order, preferring known safes, and
+        checks the AI against the reference after every reveal.
+        """
+        rng = random.Random(seed)
+        cells = [(i, j) for i in range(height) for j in range(width)]
+        mines = set(rng.sample(cells, mine_count))
+        order = cells[:]
+        rng.shuffle(order)
+
+        ai = MinesweeperAI(height=height, width=width)
+        observations = []
+        while True:
+            candidates = sorted(ai.safes - ai.moves_made)
+            if candidates:
+                move = candidates[0]
+            else:
+                move = next(
+                    (c for c in order
+                     if c not in ai.moves_made and c not in ai.mines),
+                    None,
+                )
+            if move is None or move in mines:
+                return
+            count = len(neighbours(move, height, width) & mines)
+            ai.add_knowledge(move, count)
+            observations.append((move, count))
+
+            expected_mines, expected_safes = brute_force_closure(
+                height, width, observations
+            )
+            self.assertEqual(ai.mines, expected_mines)
+            self.assertEqual(ai.safes, expected_safes)
+            self.assertLessEqual(ai.mines, mines)
+
+    def test_matches_brute_force_closure(self):
+        for height, width, mine_count, games in [
+            (8, 8, 8, 40), (8, 8, 14, 40), (5, 7, 6, 40), (6, 11, 10, 20),
+        ]:
+            for seed in range(games):
+                with self.subTest(size=(height, width), seed=seed):
+                    self.play(height, width, mine_count, seed)
+
+
+class SentenceTest(unittest.TestCase):
+
+    def test_equality_does_not_depend_on_board_width(self):
+        self.assertNotEqual(Sentence({(0, 8)}, 1), Sentence({(1, 0)}, 1))
+        ai = MinesweeperAI(height=4, width=5)
+        ai.add_knowledge((0, 0), 1)
+        self.assertIn(Sentence({(0, 1), (1, 0), (1, 1)}, 1), ai.knowledge)
+
+    def test_cells_is_a_mutable_set(self):
+        sentence = Sentence({(-1, 0), (0, 0)}, 1)
+        sentence.cells.remove((0, 0))
+        self.assertEqual(sentence, Sentence({(-1, 0)}, 1))
+        self.assertEqual(sentence.known_mines(), {(-1, 0)})
+
+
+class BoardTest(unittest.TestCase):
+
+    def test_nearby_mines(self):
+        for height, width, mine_count in [(8, 8, 8), (3, 17, 20), (9, 5, 12)]:
+            game = Minesweeper(height=height, width=width, mines=mine_count)
+            self.assertEqual(len(game.mines), mine_count)
+            for i in range(height):
+                for j in range(width):
+                    cell = (i, j)
+                    self.assertEqual(game.is_mine(cell), cell in game.mines)
+                    self.assertEqual(
+                        game.nearby_mines(cell),
+                        len(neighbours(cell, height, width) & game.mines),
+                    )
+
+    def test_rng_makes_games_reproducible(self):
+        def play(rng):
+            game = Minesweeper(height=8, width=8, mines=10, rng=rng)
+            ai = MinesweeperAI(height=8, width=8, rng=rng)
+            return game.mines, [ai.make_random_move() for _ in range(5)]
+
+        self.assertEqual(play(random.Random(7)), play(random.Random(7)))
+        random.seed(7)
+        first = play(None)
+        random.seed(7)
+        self.assertEqual(play(None), first)
+
+
+if __name__ == "__main__":
+    unittest.main()